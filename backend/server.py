@@ -1,4 +1,11 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, Depends
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, Depends, Request
+from fastapi.responses import FileResponse, Response
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartParser, MultiPartException
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -11,16 +18,36 @@ import uuid
 from datetime import datetime
 import re
 import io
-import pandas as pd
-import requests
-from pymongo import UpdateOne, ASCENDING
-from utils_auth import verify_firebase_id_token, mint_app_jwt, decode_app_jwt
+import math
+import asyncio
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pymongo import UpdateOne, ASCENDING, GEOSPHERE
+from utils_auth import verify_firebase_id_token, mint_app_jwt, decode_app_jwt, firebase_initialized, init_firebase
+from utils_geo import (
+    DEFAULT_RADIUS_KM, MAX_RADIUS_KM, is_valid_pincode, parse_point, near_pipeline, within_radius_query,
+    city_centroid_pipeline,
+)
+from utils_ratelimit import AdmissionController, load_limits, client_ip
+from utils_images import (
+    MAX_UPLOAD_BYTES, MAX_UPLOAD_OVERHEAD, ALLOWED_FORMATS, THUMB_SIZES, DIGEST_RE, ImageTooLarge,
+    content_digest, sniff_format, store_source, discard_image, process_upload, variant_path, image_url,
+    thumbnail_urls, parse_range, etag_matches,
+)
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+if os.environ.get("EAGER_IMPORTS", "").lower() in ("1", "true", "yes"):
+    # Opt-in: pay the deferred costs at import time, so a preloading master (gunicorn --preload)
+    # does it once and forked workers inherit the loaded modules and Firebase app
+    import pandas, numpy, requests, PIL.Image  # noqa: F401,E401
+    init_firebase()
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
@@ -59,13 +86,39 @@ async def get_status_checks():
     status_checks = await db.status_checks.find().to_list(1000)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
+# -------------------- Admission control --------------------
+admission = AdmissionController(load_limits())
+
+def admit(name: str):
+    """Route dependency: a token bucket per user (per IP when anonymous), then the route's in-flight cap."""
+    async def dependency(request: Request):
+        uid = None
+        auth = request.headers.get("authorization", "")
+        if auth.lower().startswith("bearer "):
+            try:
+                uid = decode_app_jwt(auth[7:]).get("sub")
+            except Exception:
+                pass  # the route's own auth dependency rejects bad tokens; limit by IP only
+        # Authenticated users are keyed by account only, so many users behind one NAT don't share a bucket
+        key = f"user:{uid}" if uid else f"ip:{client_ip(request.headers, request.client)}"
+        wait = admission.check(name, key)
+        if wait > 0:
+            raise HTTPException(status_code=429, detail="Too many requests", headers={"Retry-After": str(math.ceil(wait))})
+        if not admission.acquire(name):
+            raise HTTPException(status_code=503, detail="Server busy, try again shortly", headers={"Retry-After": "1"})
+        try:
+            yield
+        finally:
+            admission.release(name)
+    return Depends(dependency)
+
 # -------------------- Auth endpoints --------------------
 security = HTTPBearer()
 
 class ExchangeReq(BaseModel):
     idToken: str
 
-@api_router.post("/auth/exchange")
+@api_router.post("/auth/exchange", dependencies=[admit("exchange_token")])
 async def exchange_token(body: ExchangeReq):
     try:
         claims = verify_firebase_id_token(body.idToken)
@@ -86,6 +139,22 @@ async def exchange_token(body: ExchangeReq):
     app_token = mint_app_jwt({"sub": uid, **user})
     return {"token": app_token, "user": user}
 
+# Comma-separated Firebase uids allowed to call admin endpoints
+ADMIN_UIDS = {u.strip() for u in os.environ.get("ADMIN_UIDS", "").split(",") if u.strip()}
+optional_security = HTTPBearer(auto_error=False)
+
+def is_admin(credentials: Optional[HTTPAuthorizationCredentials]) -> bool:
+    if not credentials:
+        return False
+    try:
+        return decode_app_jwt(credentials.credentials).get("sub") in ADMIN_UIDS
+    except Exception:
+        return False
+
+async def require_admin(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    if not is_admin(credentials):
+        raise HTTPException(status_code=403, detail="Admin required")
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
     token = credentials.credentials
     try:
@@ -111,24 +180,53 @@ class ListingIn(BaseModel):
     size: str = ""
     plus: bool = False
     description: str = ""
+    pincode: Optional[str] = None
 
 class Listing(ListingIn):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     ownerId: str
+    # Parallel to images: {"card": url, "detail": url} per image
+    thumbnails: List[Dict[str, str]] = []
+    # GeoJSON point derived from pincode, indexed 2dsphere
+    geo: Optional[Dict[str, Any]] = None
+    # Only set on "near" searches; never stored
+    distanceKm: Optional[float] = None
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
 
+def to_listing(doc: Dict[str, Any]) -> Listing:
+    # Older documents predate thumbnails; derive them from images on read
+    if not doc.get("thumbnails"):
+        doc["thumbnails"] = thumbnail_urls(doc.get("images", []))
+    return Listing(**doc)
+
+async def pincode_point(pincode: str) -> Optional[Dict[str, Any]]:
+    doc = await db.locations.find_one({"pincode": pincode.strip(), "loc": {"$exists": True}}, {"loc": 1})
+    return doc["loc"] if doc else None
+
+async def resolve_geo(pincode: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Point for a listing's pincode; None when no pincode is given, 400 when it can't be placed."""
+    if not pincode or not pincode.strip():
+        return None
+    if not is_valid_pincode(pincode):
+        raise HTTPException(status_code=400, detail="pincode must be 6 digits")
+    point = await pincode_point(pincode)
+    if not point:
+        raise HTTPException(status_code=400, detail="Unknown pincode or no coordinates for it")
+    return point
+
 @api_router.post("/listings")
 async def create_listing(body: ListingIn, payload: Dict[str, Any] = Depends(get_current_user)):
     owner_id = payload.get("sub")
-    listing = Listing(ownerId=owner_id, **body.dict())
-    await db.listings.insert_one(listing.dict())
+    listing = Listing(ownerId=owner_id, thumbnails=thumbnail_urls(body.images), geo=await resolve_geo(body.pincode), **body.dict())
+    await db.listings.insert_one(listing.dict(exclude={"distanceKm"}))
     return listing
 
-@api_router.get("/listings")
+@api_router.get("/listings", dependencies=[admit("list_listings")])
 async def list_listings(q: Optional[str] = None, city: Optional[str] = None, locality: Optional[str] = None,
                         category: Optional[str] = None, plus: Optional[bool] = None,
                         minFootfall: Optional[int] = None, maxPrice: Optional[int] = None,
+                        near: Optional[str] = None, radiusKm: Optional[float] = None,
                         page: int = 1, limit: int = 12):
     query: Dict[str, Any] = {}
     if q:
@@ -144,8 +242,16 @@ async def list_listings(q: Optional[str] = None, city: Optional[str] = None, loc
     if maxPrice is not None: query["pricePerMonth"] = {"$lte": int(maxPrice)}
 
     skip = max(0, (page - 1) * limit)
+    if near:
+        radiusKm = DEFAULT_RADIUS_KM if radiusKm is None else radiusKm
+        if not 0 < radiusKm <= MAX_RADIUS_KM:
+            raise HTTPException(status_code=400, detail=f"radiusKm must be in (0, {MAX_RADIUS_KM}]")
+        point = await resolve_geo(near)
+        items = [to_listing(doc) async for doc in db.listings.aggregate(near_pipeline(point, radiusKm, query, skip, limit))]
+        total = await db.listings.count_documents(within_radius_query(point, radiusKm, query))
+        return {"items": items, "page": page, "limit": limit, "total": total}
     cursor = db.listings.find(query).skip(skip).limit(limit).sort("createdAt", -1)
-    items = [Listing(**doc) async for doc in cursor]
+    items = [to_listing(doc) async for doc in cursor]
     total = await db.listings.count_documents(query)
     return {"items": items, "page": page, "limit": limit, "total": total}
 
@@ -154,7 +260,7 @@ async def get_listing(id: str):
     doc = await db.listings.find_one({"id": id})
     if not doc:
         raise HTTPException(status_code=404, detail="Listing not found")
-    return Listing(**doc)
+    return to_listing(doc)
 
 @api_router.patch("/listings/{id}")
 async def update_listing(id: str, body: ListingIn, payload: Dict[str, Any] = Depends(get_current_user)):
@@ -162,10 +268,12 @@ async def update_listing(id: str, body: ListingIn, payload: Dict[str, Any] = Dep
     if not doc: raise HTTPException(status_code=404, detail="Listing not found")
     if doc.get("ownerId") != payload.get("sub"): raise HTTPException(status_code=403, detail="Not owner")
     update = body.dict()
+    update["thumbnails"] = thumbnail_urls(body.images)
+    update["geo"] = await resolve_geo(body.pincode)
     update["updatedAt"] = datetime.utcnow()
     await db.listings.update_one({"id": id}, {"$set": update})
     new_doc = await db.listings.find_one({"id": id})
-    return Listing(**new_doc)
+    return to_listing(new_doc)
 
 @api_router.delete("/listings/{id}")
 async def delete_listing(id: str, payload: Dict[str, Any] = Depends(get_current_user)):
@@ -175,6 +283,138 @@ async def delete_listing(id: str, payload: Dict[str, Any] = Depends(get_current_
     await db.listings.delete_one({"id": id})
     return {"deleted": True}
 
+# -------------------- Images --------------------
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+image_pool: Optional[ProcessPoolExecutor] = None
+
+def get_image_pool() -> ProcessPoolExecutor:
+    # Created on first upload so workers that never see an upload never fork
+    global image_pool
+    if image_pool is None:
+        # forkserver, not fork: this process already runs motor's threads and an event loop
+        image_pool = ProcessPoolExecutor(max_workers=int(os.environ.get("IMAGE_WORKERS", "2")),
+                                         mp_context=multiprocessing.get_context("forkserver"))
+    return image_pool
+
+async def run_in_image_pool(fn, *args):
+    """Run fn in the image pool, replacing the pool once if a child died (e.g. OOM-killed mid-decode)."""
+    global image_pool
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_image_pool(), fn, *args)
+    except BrokenProcessPool:
+        logger.warning("Image pool broken, recreating it and retrying once")
+        broken, image_pool = image_pool, None
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+        return await loop.run_in_executor(get_image_pool(), fn, *args)
+
+class ImageOut(BaseModel):
+    id: str
+    url: str
+    thumbnails: Dict[str, str]
+    contentType: str
+    size: int
+
+async def capped_stream(request: Request, limit: int):
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > limit:
+            raise HTTPException(status_code=413, detail="Image too large")
+        yield chunk
+
+# The multipart body is parsed by hand (no File() param) so auth, admission and the size cap
+# all run before any upload bytes are received
+@api_router.post("/images", response_model=ImageOut, dependencies=[admit("upload_image")])
+async def upload_image(request: Request, payload: Dict[str, Any] = Depends(get_current_user)):
+    body_limit = MAX_UPLOAD_BYTES + MAX_UPLOAD_OVERHEAD
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > body_limit:
+        raise HTTPException(status_code=413, detail="Image too large")
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data with a 'file' part")
+    try:
+        form = await MultiPartParser(request.headers, capped_stream(request, body_limit), max_files=1, max_fields=0).parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    file = form.get("file")
+    if not isinstance(file, UploadFile):
+        raise HTTPException(status_code=400, detail="Missing 'file' part")
+    data = await file.read(MAX_UPLOAD_BYTES + 1)
+    await form.close()
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Image too large")
+    try:
+        fmt = await run_in_threadpool(sniff_format, data)
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=f"Image dimensions too large: {e}")
+    if not fmt:
+        raise HTTPException(status_code=415, detail=f"Unsupported image type. Allowed: {sorted(ALLOWED_FORMATS)}")
+    digest = content_digest(data)
+    existing = await db.images.find_one({"id": digest})
+    if not existing:
+        source = await run_in_threadpool(store_source, digest, data)
+        try:
+            sizes = await run_in_image_pool(process_upload, digest, source)
+        except Exception as e:
+            logger.exception("Image processing failed")
+            await run_in_threadpool(discard_image, digest, source)
+            # Only wipe stored files if no concurrent upload of the same bytes has completed
+            if not await db.images.find_one({"id": digest}, {"_id": 1}):
+                await run_in_threadpool(discard_image, digest)
+            raise HTTPException(status_code=422, detail=f"Could not process image: {e}")
+        await db.images.update_one({"id": digest}, {"$setOnInsert": {
+            "id": digest,
+            "contentType": ALLOWED_FORMATS[fmt],
+            "size": variant_path(digest, "original").stat().st_size,
+            "variants": {k: list(v) for k, v in sizes.items()},
+            "ownerId": payload.get("sub"),
+            "createdAt": datetime.utcnow(),
+        }}, upsert=True)
+    return ImageOut(
+        id=digest,
+        url=image_url(digest),
+        thumbnails={variant: image_url(digest, variant) for variant in THUMB_SIZES},
+        contentType=ALLOWED_FORMATS[fmt],
+        size=(existing or {}).get("size") or variant_path(digest, "original").stat().st_size,
+    )
+
+@api_router.get("/images/{digest}/{variant}")
+async def get_image(digest: str, variant: str, request: Request):
+    if not DIGEST_RE.match(digest) or (variant != "original" and variant not in THUMB_SIZES):
+        raise HTTPException(status_code=404, detail="Image not found")
+    path = variant_path(digest, variant)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Image not found")
+    if variant == "original":
+        meta = await db.images.find_one({"id": digest}, {"contentType": 1})
+        media_type = (meta or {}).get("contentType", "application/octet-stream")
+    else:
+        media_type = "image/webp"
+    # Content-addressed, so the digest+variant is a strong validator that never changes
+    etag = f'"{digest}-{variant}"'
+    headers = {"Cache-Control": IMAGE_CACHE_CONTROL, "ETag": etag, "Accept-Ranges": "bytes"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    size = path.stat().st_size
+    try:
+        rng = parse_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if rng is None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+    start, end = rng
+
+    def read_slice() -> bytes:
+        with open(path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start + 1)
+
+    body = await run_in_threadpool(read_slice)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(content=body, status_code=206, media_type=media_type, headers=headers)
+
 # -------------------- Favorites --------------------
 @api_router.post("/listings/{id}/favorite")
 async def favorite_listing(id: str, payload: Dict[str, Any] = Depends(get_current_user)):
@@ -237,7 +477,7 @@ async def get_messages(cid: str, payload: Dict[str, Any] = Depends(get_current_u
     msgs = [Message(**doc) async for doc in db.messages.find({"conversationId": cid}).sort("ts", 1).limit(200)]
     return msgs
 
-@api_router.post("/conversations/{cid}/messages")
+@api_router.post("/conversations/{cid}/messages", dependencies=[admit("post_message")])
 async def post_message(cid: str, text: str, payload: Dict[str, Any] = Depends(get_current_user)):
     convo = await db.conversations.find_one({"id": cid})
     if not convo: raise HTTPException(status_code=404, detail="Conversation not found")
@@ -287,9 +527,14 @@ async def ws_chat(websocket: WebSocket):
         await websocket.close(code=4401)
         return
     await ws_manager.connect(cid, websocket)
+    uid_key = f"user:{payload.get('sub')}"
     try:
         while True:
             data = await websocket.receive_json()
+            wait = admission.check(f"ws:{data.get('type')}", uid_key)
+            if wait > 0:
+                await websocket.send_json({"type": "error", "code": 429, "detail": "Too many messages", "retryAfter": round(wait, 1)})
+                continue
             if data.get("type") == "msg":
                 text = data.get("text", "")
                 # store and broadcast
@@ -308,69 +553,144 @@ class Location(BaseModel):
     city: str
     pincode: str
 
+# The Home page seeds an empty locations collection anonymously from this one dataset
+PUBLIC_PINCODE_CSV = os.environ.get(
+    "PUBLIC_PINCODE_CSV", "https://www.data.gov.in/files/ogdpv2dms/s3fs-public/dataurl03122020/pincode.csv")
+
 class ImportResult(BaseModel):
     imported: int
     states: int
     cities: int
+    geocoded: int = 0
+
+def build_location_ops(source: str, url: str, coords: Optional[str]):
+    """Fetch/read and parse the CSV into upserts. Blocking (network, pandas, ~150k rows); run it in a thread."""
+    # pandas/numpy/requests are only needed here; keep them out of worker startup
+    import pandas as pd
+    import requests
+    if source == "remote":
+        resp = requests.get(url, timeout=60)
+        if resp.status_code != 200:
+            raise HTTPException(status_code=400, detail="Failed to fetch CSV")
+        content = resp.content
+    else:
+        with open(url, "rb") as f:
+            content = f.read()
+
+    # Everything as str: a blank pincode would otherwise turn the column into floats ("226001.0")
+    df = pd.read_csv(io.BytesIO(content), dtype=str)
+    # Try common column names present in India pin code datasets
+    # Fallbacks to be resilient
+    cols = {c.lower(): c for c in df.columns}
+    state_col = cols.get("statename") or cols.get("state") or cols.get("circle_name")
+    city_col = cols.get("districtname") or cols.get("district") or cols.get("regionname") or cols.get("region_name")
+    pin_col = cols.get("pincode") or cols.get("pin code") or cols.get("officename")
+    if not (state_col and city_col and pin_col):
+        raise HTTPException(status_code=400, detail=f"CSV missing required columns. Found: {list(df.columns)}")
+
+    lat_col = cols.get("latitude") or cols.get("lat")
+    lng_col = cols.get("longitude") or cols.get("long") or cols.get("lng")
+
+    # Normalize strings
+    def norm(s):
+        if pd.isna(s):
+            return ""
+        return str(s).strip().title()
+
+    # Optional local pincode -> lat/lng dataset for sources without coordinates
+    pin_points: Dict[str, Dict[str, Any]] = {}
+    if coords:
+        cdf = pd.read_csv(coords, dtype=str)
+        ccols = {c.lower(): c for c in cdf.columns}
+        c_pin = ccols.get("pincode") or ccols.get("pin code")
+        c_lat = ccols.get("latitude") or ccols.get("lat")
+        c_lng = ccols.get("longitude") or ccols.get("long") or ccols.get("lng")
+        if not (c_pin and c_lat and c_lng):
+            raise HTTPException(status_code=400, detail=f"Coordinates CSV missing pincode/latitude/longitude. Found: {list(cdf.columns)}")
+        for p, la, ln in zip(cdf[c_pin], cdf[c_lat], cdf[c_lng]):
+            pt = parse_point(la, ln)
+            if pt and isinstance(p, str):
+                pin_points.setdefault(p.strip(), pt)
+
+    ops = []
+    states_set = set()
+    cities_set = set()
+    geocoded = 0
+    for _, row in df.iterrows():
+        state = norm(row[state_col])
+        city = norm(row[city_col])
+        pin = "" if pd.isna(row[pin_col]) else str(row[pin_col]).strip()
+        if not state or not city or not pin:
+            continue
+        states_set.add(state)
+        cities_set.add((state, city))
+        doc = {"state": state, "city": city, "pincode": pin}
+        loc = parse_point(row[lat_col], row[lng_col]) if lat_col and lng_col else None
+        loc = loc or pin_points.get(pin)
+        if loc:
+            doc["loc"] = loc
+            geocoded += 1
+        ops.append(UpdateOne({"state": state, "city": city, "pincode": pin}, {"$set": doc}, upsert=True))
+    return ops, len(states_set), len(cities_set), geocoded
 
 # Locations endpoints
-@api_router.post("/admin/locations/import", response_model=ImportResult)
-async def import_locations(source: str = Query("remote", pattern="^(remote|file)$"), url: Optional[str] = None):
+@api_router.post("/admin/locations/import", response_model=ImportResult, dependencies=[admit("import_locations")])
+async def import_locations(source: str = Query("remote", pattern="^(remote|file)$"), url: Optional[str] = None,
+                           coords: Optional[str] = None,
+                           credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    # Anything beyond seeding an empty collection from the public dataset fetches arbitrary URLs,
+    # reads server files or redoes a heavy import, so it needs an admin
+    if not is_admin(credentials):
+        public_seed = source == "remote" and url == PUBLIC_PINCODE_CSV and not coords
+        if not public_seed or await db.locations.estimated_document_count() > 0:
+            raise HTTPException(status_code=403, detail="Admin required for this import")
+    if not url:
+        detail = "Missing url for remote import" if source == "remote" else "Missing path for file import (use url param as path)"
+        raise HTTPException(status_code=400, detail=detail)
     try:
-        if source == "remote":
-            if not url:
-                raise HTTPException(status_code=400, detail="Missing url for remote import")
-            resp = requests.get(url, timeout=60)
-            if resp.status_code != 200:
-                raise HTTPException(status_code=400, detail="Failed to fetch CSV")
-            content = resp.content
-        else:
-            if not url:
-                raise HTTPException(status_code=400, detail="Missing path for file import (use url param as path)")
-            with open(url, "rb") as f:
-                content = f.read()
-
-        df = pd.read_csv(io.BytesIO(content))
-        # Try common column names present in India pin code datasets
-        # Fallbacks to be resilient
-        cols = {c.lower(): c for c in df.columns}
-        state_col = cols.get("statename") or cols.get("state") or cols.get("circle_name")
-        city_col = cols.get("districtname") or cols.get("district") or cols.get("regionname") or cols.get("region_name")
-        pin_col = cols.get("pincode") or cols.get("pin code") or cols.get("officename")
-        if not (state_col and city_col and pin_col):
-            raise HTTPException(status_code=400, detail=f"CSV missing required columns. Found: {list(df.columns)}")
-
-        # Normalize strings
-        def norm(s):
-            if pd.isna(s):
-                return ""
-            return str(s).strip().title()
-
-        ops = []
-        states_set = set()
-        cities_set = set()
-        for _, row in df.iterrows():
-            state = norm(row[state_col])
-            city = norm(row[city_col])
-            pin = str(row[pin_col]).strip()
-            if not state or not city:
-                continue
-            states_set.add(state)
-            cities_set.add((state, city))
-            ops.append(UpdateOne({"state": state, "city": city, "pincode": pin}, {"$set": {"state": state, "city": city, "pincode": pin}}, upsert=True))
-
+        ops, states, cities, geocoded = await run_in_threadpool(build_location_ops, source, url, coords)
         if ops:
             await db.locations.bulk_write(ops, ordered=False)
             await db.locations.create_index([("state", ASCENDING), ("city", ASCENDING)])
             await db.locations.create_index([("city", ASCENDING)])
+            await db.locations.create_index([("pincode", ASCENDING)])
 
-        return ImportResult(imported=len(ops), states=len(states_set), cities=len(cities_set))
+        return ImportResult(imported=len(ops), states=states, cities=cities, geocoded=geocoded)
     except HTTPException:
         raise
     except Exception as e:
         logger.exception("Import failed")
         raise HTTPException(status_code=500, detail=str(e))
 
+class GeoBackfillResult(BaseModel):
+    byPincode: int
+    byCity: int
+    unresolved: int
+
+@api_router.post("/admin/listings/backfill-geo", response_model=GeoBackfillResult, dependencies=[Depends(require_admin)])
+async def backfill_listing_geo():
+    """One-off: place listings that have no geo, by pincode when set, else at their city's pincode centroid."""
+    by_pincode = by_city = unresolved = 0
+    centroids: Dict[str, Optional[Dict[str, Any]]] = {}
+    async for doc in db.listings.find({"geo": None}, {"id": 1, "pincode": 1, "city": 1}):
+        point = None
+        if is_valid_pincode(doc.get("pincode")):
+            point = await pincode_point(doc["pincode"])
+            by_pincode += bool(point)
+        city = (doc.get("city") or "").strip()
+        if not point and city:
+            key = city.lower()
+            if key not in centroids:
+                rows = await db.locations.aggregate(city_centroid_pipeline(city)).to_list(1)
+                centroids[key] = parse_point(rows[0]["lat"], rows[0]["lng"]) if rows else None
+            point = centroids[key]
+            by_city += bool(point)
+        if point:
+            await db.listings.update_one({"id": doc["id"]}, {"$set": {"geo": point}})
+        else:
+            unresolved += 1
+    return GeoBackfillResult(byPincode=by_pincode, byCity=by_city, unresolved=unresolved)
+
 @api_router.get("/locations/states", response_model=List[str])
 async def get_states():
     states = await db.locations.distinct("state")
@@ -384,13 +704,57 @@ async def get_cities(state: Optional[str] = None):
     cities = await db.locations.distinct("city", query)
     return sorted([c for c in cities if c])
 
-@api_router.get("/locations/search")
+@api_router.get("/locations/search", dependencies=[admit("search_locations")])
 async def search_locations(term: str):
     regex = {"$regex": term, "$options": "i"}
     states = await db.locations.distinct("state", {"state": regex})
     cities = await db.locations.distinct("city", {"city": regex})
     return {"states": sorted(states), "cities": sorted(cities)}
 
+# -------------------- Startup metrics --------------------
+# Modules that are deliberately deferred until first use
+LAZY_MODULES = ["pandas", "numpy", "requests", "firebase_admin", "PIL"]
+startup_stats: Dict[str, Any] = {}
+
+def current_rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+        # Peak rather than current RSS, but close enough at startup (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except Exception:
+        return None
+
+@app.on_event("startup")
+async def record_startup_stats():
+    startup_stats.update({
+        "pid": os.getpid(),
+        "importSeconds": round(_IMPORT_FINISHED - _IMPORT_STARTED, 3),
+        "startupSeconds": round(time.perf_counter() - _IMPORT_STARTED, 3),
+        "rssMb": current_rss_mb(),
+    })
+    logger.info("Worker %(pid)s ready: import %(importSeconds)ss, startup %(startupSeconds)ss, RSS %(rssMb)s MB", startup_stats)
+
+@api_router.get("/metrics/startup", dependencies=[Depends(require_admin)])
+async def get_startup_metrics():
+    return {
+        **startup_stats,
+        "rssNowMb": current_rss_mb(),
+        "loadedLazyModules": [m for m in LAZY_MODULES if m in sys.modules],
+        "firebaseInitialized": firebase_initialized(),
+    }
+
+@api_router.get("/metrics/limits", dependencies=[Depends(require_admin)])
+async def get_limit_metrics():
+    return admission.snapshot()
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -409,6 +773,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+background_tasks = set()
+
+async def ensure_indexes():
+    try:
+        # $geoNear requires a 2dsphere index; listings without a pincode simply have no geo field
+        await db.listings.create_index([("geo", GEOSPHERE)])
+        # pincode_point runs on every listing write and near= search, including on pre-existing imports
+        await db.locations.create_index([("pincode", ASCENDING)])
+    except Exception:
+        logger.exception("Index creation failed; near= search and pincode lookups may scan until it succeeds")
+
+@app.on_event("startup")
+async def schedule_ensure_indexes():
+    # In the background so a slow or unreachable Mongo doesn't hold up worker startup
+    task = asyncio.create_task(ensure_indexes())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+    if image_pool is not None:
+        image_pool.shutdown(wait=False, cancel_futures=True)
+
+_IMPORT_FINISHED = time.perf_counter()
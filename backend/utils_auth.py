@@ -3,9 +3,8 @@ import json
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
+from functools import lru_cache
 from jose import jwt, JWTError
-import firebase_admin
-from firebase_admin import credentials, auth as fb_auth
 
 # Constants
 ALG = "HS256"
@@ -13,15 +12,31 @@ SECRET_FILE = Path(__file__).parent / "app_jwt_secret.key"
 SERVICE_ACCOUNT_PATH = Path(__file__).parent / "firebase_service_account.json"
 ISSUER = "rackup-auth"
 
-# Initialize Firebase Admin using local service account file without env changes
-if not firebase_admin._apps:
-    if SERVICE_ACCOUNT_PATH.exists():
-        cred = credentials.Certificate(str(SERVICE_ACCOUNT_PATH))
-        firebase_admin.initialize_app(cred)
-    else:
-        firebase_admin.initialize_app()  # Application Default Credentials
 
+@lru_cache(maxsize=None)
+def _firebase_auth():
+    # firebase_admin is heavy (google-auth, grpc); import and initialize on first token exchange only
+    import firebase_admin
+    from firebase_admin import credentials, auth as fb_auth
+    # Initialize Firebase Admin using local service account file without env changes
+    if not firebase_admin._apps:
+        if SERVICE_ACCOUNT_PATH.exists():
+            cred = credentials.Certificate(str(SERVICE_ACCOUNT_PATH))
+            firebase_admin.initialize_app(cred)
+        else:
+            firebase_admin.initialize_app()  # Application Default Credentials
+    return fb_auth
 
+
+def init_firebase() -> None:
+    _firebase_auth()
+
+
+def firebase_initialized() -> bool:
+    return _firebase_auth.cache_info().currsize > 0
+
+
+@lru_cache(maxsize=None)
 def _ensure_secret() -> bytes:
     if SECRET_FILE.exists():
         return SECRET_FILE.read_bytes()
@@ -31,11 +46,8 @@ def _ensure_secret() -> bytes:
     return secret
 
 
-APP_SECRET = _ensure_secret()
-
-
 def verify_firebase_id_token(id_token: str) -> Dict[str, Any]:
-    decoded = fb_auth.verify_id_token(id_token)
+    decoded = _firebase_auth().verify_id_token(id_token)
     return decoded
 
 
@@ -46,11 +58,11 @@ def mint_app_jwt(payload: Dict[str, Any], expires_minutes: int = 60 * 24) -> str
         "iat": int(datetime.utcnow().timestamp()),
         "exp": int((datetime.utcnow() + timedelta(minutes=expires_minutes)).timestamp()),
     })
-    return jwt.encode(to_encode, APP_SECRET, algorithm=ALG)
+    return jwt.encode(to_encode, _ensure_secret(), algorithm=ALG)
 
 
 def decode_app_jwt(token: str) -> Dict[str, Any]:
     try:
-        return jwt.decode(token, APP_SECRET, algorithms=[ALG])
+        return jwt.decode(token, _ensure_secret(), algorithms=[ALG])
     except JWTError as e:
         raise e
\ No newline at end of file
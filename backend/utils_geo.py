@@ -0,0 +1,57 @@
+import math
+import re
+from typing import Optional, Dict, Any, List
+
+# Constants
+EARTH_RADIUS_KM = 6378.1
+DEFAULT_RADIUS_KM = 10
+MAX_RADIUS_KM = 100
+PINCODE_RE = re.compile(r"^\d{6}$")
+
+
+def is_valid_pincode(pincode: Optional[str]) -> bool:
+    return bool(pincode) and bool(PINCODE_RE.match(pincode.strip()))
+
+
+def parse_point(lat: Any, lng: Any) -> Optional[Dict[str, Any]]:
+    """GeoJSON Point from dataset lat/lng cells, or None when missing or implausible.
+
+    Datasets use "NA"/blank for unknown coordinates and 0/0 as a placeholder. GeoJSON is [lng, lat].
+    """
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(lat) or math.isnan(lng) or (lat == 0 and lng == 0):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+def near_pipeline(point: Dict[str, Any], radius_km: float, query: Dict[str, Any],
+                  skip: int, limit: int) -> List[Dict[str, Any]]:
+    # $geoNear must lead the pipeline; it uses the 2dsphere index and returns results nearest first
+    return [
+        {"$geoNear": {"near": point, "distanceField": "distanceKm", "distanceMultiplier": 0.001,
+                      "maxDistance": radius_km * 1000, "spherical": True, "query": query}},
+        {"$skip": skip},
+        {"$limit": limit},
+    ]
+
+
+def within_radius_query(point: Dict[str, Any], radius_km: float, query: Dict[str, Any]) -> Dict[str, Any]:
+    # count_documents cannot use $near; $geoWithin covers the same circle ($centerSphere takes radians)
+    return {**query, "geo": {"$geoWithin": {"$centerSphere": [point["coordinates"], radius_km / EARTH_RADIUS_KM]}}}
+
+
+def city_centroid_pipeline(city: str) -> List[Dict[str, Any]]:
+    """Average of the geocoded pincodes in a city, used to place listings that predate pincodes."""
+    return [
+        {"$match": {"city": {"$regex": f"^{re.escape(city.strip())}$", "$options": "i"}, "loc": {"$exists": True}}},
+        {"$group": {
+            "_id": None,
+            "lng": {"$avg": {"$arrayElemAt": ["$loc.coordinates", 0]}},
+            "lat": {"$avg": {"$arrayElemAt": ["$loc.coordinates", 1]}},
+        }},
+    ]
@@ -0,0 +1,213 @@
+import os
+import re
+import io
+import hashlib
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple
+
+# Constants
+UPLOAD_DIR = Path(os.environ.get("UPLOAD_DIR", str(Path(__file__).parent / "uploads")))
+IMAGE_URL_PREFIX = "/api/images"
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+# Multipart boundaries and part headers on top of the file itself
+MAX_UPLOAD_OVERHEAD = 64 * 1024
+# Small files can still decode to huge bitmaps; cap width*height before any full decode
+MAX_IMAGE_PIXELS = 40_000_000
+ALLOWED_FORMATS = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+# Bounding boxes for the listing grid card and the detail carousel
+THUMB_SIZES: Dict[str, Tuple[int, int]] = {
+    "card": (480, 360),
+    "detail": (1280, 960),
+}
+WEBP_QUALITY = 80
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+IMAGE_URL_RE = re.compile(rf"^{re.escape(IMAGE_URL_PREFIX)}/([0-9a-f]{{64}})/original$")
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def image_dir(digest: str) -> Path:
+    # Shard by the first two hex chars so no single directory grows unbounded
+    return UPLOAD_DIR / digest[:2] / digest
+
+
+def variant_path(digest: str, variant: str) -> Path:
+    if variant == "original":
+        return image_dir(digest) / "original"
+    return image_dir(digest) / f"{variant}.webp"
+
+
+def image_url(digest: str, variant: str = "original") -> str:
+    return f"{IMAGE_URL_PREFIX}/{digest}/{variant}"
+
+
+def sniff_format(data: bytes) -> Optional[str]:
+    """Return the Pillow format name if data is an allowed image, else None.
+
+    Raises ImageTooLarge if the declared dimensions exceed MAX_IMAGE_PIXELS.
+    """
+    from PIL import Image
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            width, height = im.size
+            im.verify()
+            fmt = im.format
+    except Image.DecompressionBombError as e:
+        # Pillow's own limit trips before ours for truly huge declared sizes
+        raise ImageTooLarge(str(e))
+    except Exception:
+        return None
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ImageTooLarge(f"{width}x{height} exceeds {MAX_IMAGE_PIXELS} pixels")
+    return fmt if fmt in ALLOWED_FORMATS else None
+
+
+def _atomic_write(path: Path, write) -> None:
+    # Unique temp file + rename so concurrent writers (threads or processes) never collide or see a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def store_source(digest: str, data: bytes) -> str:
+    """Write the raw upload under a unique name; process_upload turns it into the served files and removes it.
+
+    Raw uploads keep their EXIF, so they never get a servable name.
+    """
+    directory = image_dir(digest)
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, prefix="source-", suffix=".upload")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return path
+
+
+def discard_image(digest: str, source: Optional[str] = None) -> None:
+    """Remove a failed upload: just its raw source, or (source=None) everything stored for digest."""
+    if source is not None:
+        try:
+            os.unlink(source)
+        except FileNotFoundError:
+            pass
+        return
+    shutil.rmtree(image_dir(digest), ignore_errors=True)
+
+
+def _save_sanitized(im, fmt: str, icc_profile: Optional[bytes], f) -> None:
+    # Re-encode without EXIF/XMP/text chunks so GPS and device data never reach the public original
+    params: Dict[str, object] = {"exif": b"", "xmp": b""}
+    if icc_profile:
+        params["icc_profile"] = icc_profile
+    if fmt in ("JPEG", "WEBP"):
+        params["quality"] = 92
+    im.save(f, fmt, **params)
+
+
+def process_upload(digest: str, source: str) -> Dict[str, Tuple[int, int]]:
+    """Write the metadata-free original and every THUMB_SIZES variant as WebP, then drop the raw upload.
+
+    CPU-bound, meant to run in a process pool.
+    """
+    from PIL import Image, ImageOps
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    sizes: Dict[str, Tuple[int, int]] = {}
+    with Image.open(source) as im:
+        fmt = im.format
+        icc_profile = im.info.get("icc_profile")
+        im.load()
+        # Orientation is baked into the pixels because the EXIF tag carrying it is stripped
+        ImageOps.exif_transpose(im, in_place=True)
+    original = variant_path(digest, "original")
+    if not original.exists():
+        _atomic_write(original, lambda f: _save_sanitized(im, fmt, icc_profile, f))
+
+    del im
+    with Image.open(source) as im:
+        if im.format == "JPEG":
+            # Let libjpeg decode at a reduced scale instead of materialising the full-resolution bitmap
+            longest = max(max(box) for box in THUMB_SIZES.values())
+            im.draft("RGB", (longest, longest))
+        im.load()
+        ImageOps.exif_transpose(im, in_place=True)
+    if im.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in im.getbands() or (im.mode == "P" and "transparency" in im.info)
+        im = im.convert("RGBA" if has_alpha else "RGB")
+    # Largest variant first, each smaller one derived from the previous, so the full bitmap is never copied
+    for variant, box in sorted(THUMB_SIZES.items(), key=lambda kv: kv[1][0] * kv[1][1], reverse=True):
+        im.thumbnail(box, Image.LANCZOS)
+        out = variant_path(digest, variant)
+        if not out.exists():
+            _atomic_write(out, lambda f: im.save(f, "WEBP", quality=WEBP_QUALITY, method=4))
+        sizes[variant] = im.size
+    os.unlink(source)
+    return sizes
+
+
+def thumbnail_urls(images: List[str]) -> List[Dict[str, str]]:
+    """Map listing image URLs to per-variant URLs. External URLs have no thumbnails and pass through."""
+    result = []
+    for url in images:
+        m = IMAGE_URL_RE.match(url)
+        if m:
+            result.append({variant: image_url(m.group(1), variant) for variant in THUMB_SIZES})
+        else:
+            result.append({variant: url for variant in THUMB_SIZES})
+    return result
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single 'bytes=start-end' range. Returns inclusive (start, end) or None if absent/unsupported.
+
+    Raises ValueError for a syntactically valid but unsatisfiable range. Invalid ranges
+    (e.g. last-pos before first-pos) are ignored per RFC 9110 and return None.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_s, _, end_s = header[len("bytes="):].strip().partition("-")
+    if not (start_s.isdigit() or end_s.isdigit()) or (start_s and not start_s.isdigit()) or (end_s and not end_s.isdigit()):
+        return None
+    if start_s == "":
+        # suffix range: last N bytes
+        length = int(end_s)
+        if length == 0:
+            raise ValueError("unsatisfiable range")
+        return max(0, size - length), size - 1
+    start = int(start_s)
+    if end_s and int(end_s) < start:
+        return None
+    if start >= size:
+        raise ValueError("unsatisfiable range")
+    end = int(end_s) if end_s else size - 1
+    return start, min(end, size - 1)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header (a list or "*") against etag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import logging
+import ipaddress
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Tuple
+
+# Constants
+MAX_BUCKETS = 100_000
+# X-Forwarded-For is client-writable; only trust it when running behind proxies we control.
+# Each trusted proxy appends the address it saw, so the client is TRUSTED_PROXY_HOPS entries from the right.
+TRUST_PROXY_HEADERS = os.environ.get("TRUST_PROXY_HEADERS", "0").lower() in ("1", "true", "yes")
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", "1"))
+
+logger = logging.getLogger(__name__)
+_warned_untrusted_proxy = False
+
+
+@dataclass
+class Limit:
+    rate: float  # tokens refilled per second
+    burst: int  # bucket capacity
+    concurrency: Optional[int] = None  # max in-flight requests per worker, None for uncapped
+
+
+# Keyed by route name (or "ws:<type>" for WebSocket message types)
+DEFAULT_LIMITS: Dict[str, Limit] = {
+    "list_listings": Limit(rate=10, burst=30, concurrency=32),
+    "search_locations": Limit(rate=5, burst=20, concurrency=16),
+    "import_locations": Limit(rate=1 / 600, burst=1, concurrency=1),
+    "upload_image": Limit(rate=1, burst=10, concurrency=4),
+    "exchange_token": Limit(rate=1, burst=5),
+    "post_message": Limit(rate=2, burst=10),
+    "ws:msg": Limit(rate=2, burst=10),
+    "ws:ping": Limit(rate=1, burst=5),
+}
+
+
+def load_limits() -> Dict[str, Limit]:
+    """DEFAULT_LIMITS overlaid with the RATE_LIMITS env var, e.g. {"search_locations": {"rate": 2, "burst": 5}}."""
+    limits = dict(DEFAULT_LIMITS)
+    raw = os.environ.get("RATE_LIMITS")
+    if raw:
+        for name, cfg in json.loads(raw).items():
+            base = limits.get(name, Limit(rate=cfg.get("rate", 1), burst=cfg.get("burst", 1)))
+            limits[name] = Limit(
+                rate=cfg.get("rate", base.rate),
+                burst=cfg.get("burst", base.burst),
+                concurrency=cfg.get("concurrency", base.concurrency),
+            )
+    for name, limit in limits.items():
+        # check() divides by rate; fail at startup rather than with a 500 on the first limited request
+        if not limit.rate > 0 or limit.burst < 1 or (limit.concurrency is not None and limit.concurrency < 1):
+            raise ValueError(f"RATE_LIMITS[{name!r}]: rate must be > 0, burst and concurrency >= 1, got {limit}")
+    return limits
+
+
+class AdmissionController:
+    """Per-key token buckets plus per-route in-flight caps.
+
+    Everything runs on the event loop, so no locking is needed; state is per worker process.
+    """
+
+    def __init__(self, limits: Dict[str, Limit]):
+        self.limits = limits
+        # (route, key) -> (tokens, last refill); LRU-bounded so spoofed keys cannot grow it forever
+        self.buckets: "OrderedDict[Tuple[str, str], Tuple[float, float]]" = OrderedDict()
+        self.inflight: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, Dict[str, int]] = defaultdict(lambda: {"allowed": 0, "rateLimited": 0, "shed": 0})
+
+    def _refill(self, limit: Limit, bucket_key: Tuple[str, str], now: float) -> float:
+        tokens, last = self.buckets.get(bucket_key, (float(limit.burst), now))
+        return min(float(limit.burst), tokens + (now - last) * limit.rate)
+
+    def _store(self, bucket_key: Tuple[str, str], tokens: float, now: float):
+        self.buckets.pop(bucket_key, None)
+        self.buckets[bucket_key] = (tokens, now)
+        if len(self.buckets) > MAX_BUCKETS:
+            self.buckets.popitem(last=False)
+
+    def check(self, name: str, *keys: str) -> float:
+        """Take a token from every key's bucket on route name, all or nothing. Counts the outcome.
+
+        Returns 0 if allowed, else seconds until every bucket has a token again.
+        """
+        limit = self.limits.get(name)
+        if limit is None:
+            # Unconfigured (possibly client-chosen, e.g. WS message type) names are neither limited nor counted
+            return 0.0
+        now = time.monotonic()
+        refilled = {(name, k): self._refill(limit, (name, k), now) for k in keys if k}
+        wait = max(((1 - tokens) / limit.rate for tokens in refilled.values() if tokens < 1), default=0.0)
+        for bucket_key, tokens in refilled.items():
+            self._store(bucket_key, tokens if wait > 0 else tokens - 1, now)
+        self.counters[name]["rateLimited" if wait > 0 else "allowed"] += 1
+        return wait
+
+    def acquire(self, name: str) -> bool:
+        limit = self.limits.get(name)
+        if limit is not None and limit.concurrency is not None and self.inflight[name] >= limit.concurrency:
+            self.counters[name]["shed"] += 1
+            return False
+        self.inflight[name] += 1
+        return True
+
+    def release(self, name: str):
+        self.inflight[name] -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "routes": {
+                name: {**self.counters[name], "inflight": self.inflight[name]}
+                for name in sorted(set(self.counters) | set(self.inflight))
+            },
+            "trackedBuckets": len(self.buckets),
+            "limits": {name: vars(limit) for name, limit in self.limits.items()},
+        }
+
+
+def client_ip(headers, client, trust_proxy: bool = TRUST_PROXY_HEADERS, hops: int = TRUSTED_PROXY_HOPS) -> str:
+    if trust_proxy and hops > 0:
+        hops_seen = [h.strip() for h in headers.get("x-forwarded-for", "").split(",") if h.strip()]
+        if len(hops_seen) >= hops:
+            return hops_seen[-hops]
+    peer = client.host if client else "unknown"
+    if not trust_proxy:
+        warn_if_untrusted_proxy(peer, headers)
+    return peer
+
+
+def warn_if_untrusted_proxy(peer: str, headers) -> None:
+    """Log once when requests arrive from a private peer with X-Forwarded-For while proxy headers are ignored.
+
+    That is the ingress, and every anonymous client then shares its one ip: bucket.
+    """
+    global _warned_untrusted_proxy
+    if _warned_untrusted_proxy or "x-forwarded-for" not in headers:
+        return
+    try:
+        private = ipaddress.ip_address(peer).is_private
+    except ValueError:
+        return
+    if private:
+        _warned_untrusted_proxy = True
+        logger.warning("Requests from private peer %s carry X-Forwarded-For but TRUST_PROXY_HEADERS is off; "
+                       "all anonymous clients share one rate-limit bucket. Set TRUST_PROXY_HEADERS=1 "
+                       "(and TRUSTED_PROXY_HOPS) when behind the ingress.", peer)
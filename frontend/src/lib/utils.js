@@ -4,3 +4,12 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs) {
   return twMerge(clsx(inputs));
 }
+
+// Uploaded images come back as backend-relative paths (/api/images/...); external URLs pass through
+export function imageSrc(item, idx = 0, variant = "card") {
+  const src = item?.thumbnails?.[idx]?.[variant] || item?.images?.[idx];
+  if (src && src.startsWith("/") && process.env.REACT_APP_BACKEND_URL) {
+    return `${process.env.REACT_APP_BACKEND_URL}${src}`;
+  }
+  return src;
+}
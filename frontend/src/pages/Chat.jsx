@@ -8,6 +8,7 @@ import { ScrollArea } from "../components/ui/scroll-area";
 import { toast } from "../hooks/use-toast";
 import { ArrowLeft, SendHorizonal } from "lucide-react";
 import axios from "axios";
+import { imageSrc } from "../lib/utils";
 
 export default function Chat(){
   const { listingId } = useParams();
@@ -71,7 +72,7 @@ export default function Chat(){
         <div className="grid md:grid-cols-3 gap-6">
           <Card className="md:col-span-1">
             <CardContent className="p-4 flex items-center gap-3">
-              <img src={item.images?.[0]} alt={item.title} className="h-16 w-16 object-cover rounded"/>
+              <img src={imageSrc(item)} alt={item.title} className="h-16 w-16 object-cover rounded"/>
               <div>
                 <div className="font-semibold line-clamp-1">{item.title}</div>
                 <div className="text-xs text-muted-foreground">{item.locality}, {item.city}</div>
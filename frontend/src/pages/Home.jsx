@@ -9,6 +9,7 @@ import { Link, useNavigate } from "react-router-dom";
 import { MapPin, Sparkles, Eye, Heart, Share2, Users, Zap, Wallet } from "lucide-react";
 import { toast } from "../hooks/use-toast";
 import axios from "axios";
+import { imageSrc } from "../lib/utils";
 
 const SectionTitle = ({children, action}) => (
   <div className="flex items-center justify-between mb-3">
@@ -22,7 +23,7 @@ const ListingCard = ({ item, onFav }) => {
   return (
     <Card className="overflow-hidden group">
       <div className="relative aspect-[4/3] overflow-hidden">
-        <img src={item.images?.[0]} alt={item.title} className="h-full w-full object-cover transition-transform duration-300 group-hover:scale-105" />
+        <img src={imageSrc(item)} alt={item.title} loading="lazy" className="h-full w-full object-cover transition-transform duration-300 group-hover:scale-105" />
         {item.plus && (
           <Badge className="absolute top-2 left-2 bg-blue-600">RackUp Plus</Badge>
         )}
@@ -7,6 +7,7 @@ import { Badge } from "../components/ui/badge";
 import { Carousel, CarouselContent, CarouselItem } from "../components/ui/carousel";
 import { MapPin, Users, BadgeIndianRupee, MessageSquare } from "lucide-react";
 import axios from "axios";
+import { imageSrc } from "../lib/utils";
 
 export default function ListingDetail(){
   const { id } = useParams();
@@ -34,9 +35,9 @@ export default function ListingDetail(){
           <Card className="overflow-hidden">
             <Carousel className="w-full">
               <CarouselContent>
-                {item.images?.map((src, idx)=> (
+                {item.images?.map((_, idx)=> (
                   <CarouselItem key={idx}>
-                    <img src={src} alt={`${item.title}-${idx}`} className="w-full h-[320px] object-cover"/>
+                    <img src={imageSrc(item, idx, "detail")} alt={`${item.title}-${idx}`} className="w-full h-[320px] object-cover"/>
                   </CarouselItem>
                 ))}
               </CarouselContent>
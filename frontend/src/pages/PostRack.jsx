@@ -19,6 +19,7 @@ export default function PostRack(){
     title: "",
     city: "Lucknow",
     locality: "Gomti Nagar",
+    pincode: "",
     footfall: 1000,
     expectedRevenue: 25000,
     pricePerMonth: 5000,
@@ -29,18 +30,38 @@ export default function PostRack(){
     description: ""
   });
   const [imageUrls, setImageUrls] = useState("");
+  const [uploaded, setUploaded] = useState([]);
+  const [uploading, setUploading] = useState(false);
+
+  const uploadFiles = async (files) => {
+    if(!user) { toast({ title: "Please login to upload"}); return; }
+    setUploading(true);
+    try {
+      for (const file of Array.from(files)) {
+        const fd = new FormData();
+        fd.append("file", file);
+        const { data } = await axios.post(`/images`, fd);
+        setUploaded((prev)=> [...prev, data.url]);
+      }
+    } catch (e) {
+      toast({ title: "Upload failed", description: e?.response?.data?.detail || e?.message, variant: "destructive" });
+    } finally {
+      setUploading(false);
+    }
+  };
 
   const submit = async () => {
     if(!user) { toast({ title: "Please login to post"}); return; }
-    const urls = imageUrls.split(/\n|,\s*/).map(s=>s.trim()).filter(Boolean);
-    if(urls.length === 0) { toast({ title: "Add image URLs (one per line)"}); return; }
+    const urls = [...uploaded, ...imageUrls.split(/\n|,\s*/).map(s=>s.trim()).filter(Boolean)];
+    if(urls.length === 0) { toast({ title: "Upload photos or add image URLs (one per line)"}); return; }
+    if(!/^\d{6}$/.test(form.pincode)) { toast({ title: "Enter the 6-digit pincode of the shop"}); return; }
     try {
       const body = { ...form, images: urls };
       const { data } = await axios.post(`/listings`, body);
       toast({ title: "Shelf posted" });
       nav(`/listing/${data.id}`);
     } catch (e) {
-      toast({ title: "Failed to post", description: e?.message, variant: "destructive" });
+      toast({ title: "Failed to post", description: e?.response?.data?.detail || e?.message, variant: "destructive" });
     }
   };
 
@@ -65,6 +86,10 @@ export default function PostRack(){
                   <Input value={form.locality} onChange={(e)=>setForm({ ...form, locality: e.target.value })} />
                 </div>
               </div>
+              <div>
+                <Label>Pincode</Label>
+                <Input inputMode="numeric" maxLength={6} value={form.pincode} onChange={(e)=>setForm({ ...form, pincode: e.target.value.replace(/\D/g, "") })} placeholder="e.g., 226010"/>
+              </div>
               <div className="grid grid-cols-2 gap-3">
                 <div>
                   <Label>Footfall / day</Label>
@@ -97,7 +122,12 @@ export default function PostRack(){
 
             <div className="space-y-4">
               <div>
-                <Label>Image URLs (one per line)</Label>
+                <Label>Upload photos</Label>
+                <Input type="file" accept="image/jpeg,image/png,image/webp" multiple disabled={uploading} onChange={(e)=>uploadFiles(e.target.files)}/>
+                {uploaded.length > 0 && <div className="text-xs text-muted-foreground mt-1">{uploaded.length} photo(s) uploaded</div>}
+              </div>
+              <div>
+                <Label>Or image URLs (one per line)</Label>
                 <Textarea rows={6} value={imageUrls} onChange={(e)=>setImageUrls(e.target.value)} placeholder="https://...jpg\nhttps://...jpg"/>
               </div>
               <div>
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# server.py imports its helpers as top-level modules (utils_auth, utils_images, ...)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+HEAVY = ["pandas", "numpy", "requests", "PIL", "firebase_admin"]
+
+
+def loaded_after_import(module, **env):
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    env = {k: v for k, v in os.environ.items() if k != "EAGER_IMPORTS"}
+    env.update({"MONGO_URL": "mongodb://localhost:27017", "DB_NAME": "test_database"})
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, env=env,
+                         capture_output=True, text=True, check=True)
+    return out.stdout.strip()
+
+
+def test_utils_images_defers_pillow():
+    assert loaded_after_import("utils_images") == ""
+
+
+def test_server_import_defers_heavy_modules():
+    for dep in ("fastapi", "motor", "dotenv", "jose"):
+        pytest.importorskip(dep)
+    assert loaded_after_import("server") == ""
@@ -0,0 +1,62 @@
+import pytest
+
+from utils_geo import (
+    EARTH_RADIUS_KM, city_centroid_pipeline, is_valid_pincode, near_pipeline, parse_point, within_radius_query,
+)
+
+LUCKNOW = {"type": "Point", "coordinates": [80.9462, 26.8467]}
+
+
+def test_parse_point_orders_lng_lat():
+    assert parse_point("26.8467", "80.9462") == LUCKNOW
+    assert parse_point(26.8467, 80.9462) == LUCKNOW
+
+
+@pytest.mark.parametrize("lat,lng", [
+    ("NA", "80.9"),
+    ("26.8", "NA"),
+    ("", ""),
+    (None, None),
+    (float("nan"), 80.9),
+    ("0", "0"),
+    (91, 80.9),
+    (26.8, 181),
+    (-90.5, 0),
+])
+def test_parse_point_rejects_missing_and_implausible(lat, lng):
+    assert parse_point(lat, lng) is None
+
+
+def test_parse_point_accepts_zero_on_one_axis():
+    assert parse_point(0, 80.9) == {"type": "Point", "coordinates": [80.9, 0.0]}
+
+
+@pytest.mark.parametrize("pin,ok", [("226010", True), (" 226010 ", True), ("22601", False),
+                                    ("226010.0", False), ("abcdef", False), ("", False), (None, False)])
+def test_is_valid_pincode(pin, ok):
+    assert is_valid_pincode(pin) is ok
+
+
+def test_near_pipeline_leads_with_geo_near_in_meters():
+    query = {"plus": True}
+    pipeline = near_pipeline(LUCKNOW, 5, query, skip=12, limit=12)
+    geo_near = pipeline[0]["$geoNear"]
+    assert geo_near["near"] == LUCKNOW
+    assert geo_near["maxDistance"] == 5000
+    assert geo_near["distanceMultiplier"] == 0.001
+    assert geo_near["query"] == query
+    assert pipeline[1:] == [{"$skip": 12}, {"$limit": 12}]
+
+
+def test_within_radius_query_uses_radians_and_keeps_filters():
+    q = within_radius_query(LUCKNOW, 10, {"plus": True})
+    assert q["plus"] is True
+    center, radians = q["geo"]["$geoWithin"]["$centerSphere"]
+    assert center == LUCKNOW["coordinates"]
+    assert radians == pytest.approx(10 / EARTH_RADIUS_KM)
+
+
+def test_city_centroid_pipeline_escapes_city():
+    match = city_centroid_pipeline(" Lucknow (Urban) ")[0]["$match"]
+    assert match["city"]["$regex"] == r"^Lucknow\ \(Urban\)$"
+    assert match["loc"] == {"$exists": True}
@@ -0,0 +1,110 @@
+import pytest
+
+from utils_images import etag_matches, image_url, parse_range, thumbnail_urls
+
+DIGEST = "a" * 64
+
+
+def test_parse_range_absent_or_unsupported():
+    assert parse_range(None, 100) is None
+    assert parse_range("items=0-1", 100) is None
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("bytes=x", 100) is None
+    assert parse_range("bytes=-", 100) is None
+
+
+def test_parse_range_closed_and_open():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=5-", 100) == (5, 99)
+    assert parse_range("bytes=90-500", 100) == (90, 99)
+
+
+def test_parse_range_suffix():
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    with pytest.raises(ValueError):
+        parse_range("bytes=-0", 100)
+
+
+def test_parse_range_unsatisfiable():
+    with pytest.raises(ValueError):
+        parse_range("bytes=200-", 100)
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-150", 100)
+
+
+def test_parse_range_invalid_is_ignored():
+    # last-pos before first-pos is invalid syntax, not unsatisfiable (RFC 9110 14.1.1)
+    assert parse_range("bytes=5-3", 100) is None
+
+
+def test_thumbnail_urls_maps_uploaded_and_passes_external():
+    external = "http://x/y.jpg"
+    assert thumbnail_urls([image_url(DIGEST), external]) == [
+        {"card": image_url(DIGEST, "card"), "detail": image_url(DIGEST, "detail")},
+        {"card": external, "detail": external},
+    ]
+    # Only originals are mapped; a thumbnail URL is treated as external
+    assert thumbnail_urls([image_url(DIGEST, "card")])[0]["card"] == image_url(DIGEST, "card")
+
+
+def test_etag_matches():
+    etag = f'"{DIGEST}-card"'
+    assert etag_matches(etag, etag)
+    assert etag_matches("*", etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def _jpeg_with_gps(size=(64, 48)):
+    Image = pytest.importorskip("PIL.Image")
+    import io
+    im = Image.new("RGB", size, "red")
+    exif = Image.Exif()
+    exif[0x0110] = "SecretPhone"  # Model
+    exif[0x8825] = {1: "N", 2: (26.0, 50.0, 0.0)}  # GPSInfo
+    buf = io.BytesIO()
+    im.save(buf, "JPEG", exif=exif)
+    return buf.getvalue()
+
+
+def test_process_upload_strips_metadata_and_renders_variants(tmp_path, monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    import utils_images
+    monkeypatch.setattr(utils_images, "UPLOAD_DIR", tmp_path)
+    data = _jpeg_with_gps()
+    digest = utils_images.content_digest(data)
+    source = utils_images.store_source(digest, data)
+    sizes = utils_images.process_upload(digest, source)
+    assert set(sizes) == set(utils_images.THUMB_SIZES)
+    with Image.open(utils_images.variant_path(digest, "original")) as im:
+        assert not im.getexif()
+    assert b"SecretPhone" not in utils_images.variant_path(digest, "original").read_bytes()
+    assert not any(p.name.startswith("source-") for p in utils_images.image_dir(digest).iterdir())
+
+
+def test_process_upload_keeps_palette_transparency(tmp_path, monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    import io
+    import utils_images
+    monkeypatch.setattr(utils_images, "UPLOAD_DIR", tmp_path)
+    im = Image.new("P", (10, 10), 0)
+    im.putpalette([0, 0, 0, 255, 0, 0])
+    im.info["transparency"] = 0
+    buf = io.BytesIO()
+    im.save(buf, "PNG", transparency=0)
+    data = buf.getvalue()
+    digest = utils_images.content_digest(data)
+    utils_images.process_upload(digest, utils_images.store_source(digest, data))
+    with Image.open(utils_images.variant_path(digest, "card")) as card:
+        assert card.mode == "RGBA"
+        assert card.getpixel((0, 0))[3] == 0
+
+
+def test_sniff_format_maps_decompression_bomb_to_too_large(monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    import utils_images
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 10)
+    with pytest.raises(utils_images.ImageTooLarge):
+        utils_images.sniff_format(_jpeg_with_gps())
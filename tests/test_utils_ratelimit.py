@@ -0,0 +1,134 @@
+import pytest
+
+import utils_ratelimit
+from utils_ratelimit import AdmissionController, Limit, client_ip
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(utils_ratelimit.time, "monotonic", c)
+    return c
+
+
+def controller(**limits):
+    return AdmissionController({name: limit for name, limit in limits.items()})
+
+
+def test_burst_then_wait(clock):
+    ac = controller(r=Limit(rate=2, burst=3))
+    assert [ac.check("r", "u") for _ in range(3)] == [0, 0, 0]
+    assert ac.check("r", "u") == pytest.approx(0.5)
+    counters = ac.snapshot()["routes"]["r"]
+    assert (counters["allowed"], counters["rateLimited"]) == (3, 1)
+
+
+def test_refill_is_capped_at_burst(clock):
+    ac = controller(r=Limit(rate=1, burst=2))
+    ac.check("r", "u")
+    ac.check("r", "u")
+    clock.now += 0.5
+    assert ac.check("r", "u") == pytest.approx(0.5)
+    clock.now += 0.5
+    assert ac.check("r", "u") == 0
+    clock.now += 100
+    assert [ac.check("r", "u") for _ in range(3)][-1] > 0
+
+
+def test_keys_are_independent(clock):
+    ac = controller(r=Limit(rate=1, burst=1))
+    assert ac.check("r", "a") == 0
+    assert ac.check("r", "a") > 0
+    assert ac.check("r", "b") == 0
+
+
+def test_rejected_check_consumes_no_tokens(clock):
+    ac = controller(r=Limit(rate=1, burst=2))
+    ac.check("r", "ip")
+    ac.check("r", "ip")
+    assert ac.check("r", "user", "ip") > 0
+    # the user bucket was not charged for the rejected request
+    assert ac.check("r", "user") == 0
+    assert ac.check("r", "user") == 0
+
+
+def test_unconfigured_names_are_not_limited_or_counted(clock):
+    ac = controller(r=Limit(rate=1, burst=1))
+    assert ac.check("ws:whatever", "u") == 0
+    assert "ws:whatever" not in ac.snapshot()["routes"]
+
+
+def test_eviction_bounds_buckets_and_keeps_recent(clock, monkeypatch):
+    monkeypatch.setattr(utils_ratelimit, "MAX_BUCKETS", 2)
+    ac = controller(r=Limit(rate=1, burst=1))
+    ac.check("r", "a")
+    ac.check("r", "b")
+    ac.check("r", "a")  # touching a makes b the oldest
+    ac.check("r", "c")
+    assert set(ac.buckets) == {("r", "a"), ("r", "c")}
+
+
+def test_concurrency_cap_sheds(clock):
+    ac = controller(r=Limit(rate=1, burst=1, concurrency=1))
+    assert ac.acquire("r")
+    assert not ac.acquire("r")
+    ac.release("r")
+    assert ac.acquire("r")
+    assert ac.snapshot()["routes"]["r"]["shed"] == 1
+
+
+class Peer:
+    host = "10.0.0.1"
+
+
+def test_client_ip_ignores_forwarded_for_by_default():
+    headers = {"x-forwarded-for": "1.2.3.4"}
+    assert client_ip(headers, Peer(), trust_proxy=False) == "10.0.0.1"
+
+
+def test_client_ip_uses_trusted_hop_from_the_right():
+    # client-written entries on the left cannot change the key
+    headers = {"x-forwarded-for": "6.6.6.6, 1.2.3.4"}
+    assert client_ip(headers, Peer(), trust_proxy=True, hops=1) == "1.2.3.4"
+    assert client_ip(headers, Peer(), trust_proxy=True, hops=2) == "6.6.6.6"
+    assert client_ip(headers, Peer(), trust_proxy=True, hops=3) == "10.0.0.1"
+    assert client_ip({}, None, trust_proxy=True) == "unknown"
+
+
+@pytest.mark.parametrize("cfg", ['{"r": {"rate": 0, "burst": 1}}', '{"r": {"rate": -1, "burst": 1}}',
+                                 '{"r": {"rate": 1, "burst": 0}}', '{"list_listings": {"concurrency": 0}}'])
+def test_load_limits_rejects_degenerate_config(monkeypatch, cfg):
+    monkeypatch.setenv("RATE_LIMITS", cfg)
+    with pytest.raises(ValueError):
+        utils_ratelimit.load_limits()
+
+
+def test_load_limits_overlays_env(monkeypatch):
+    monkeypatch.setenv("RATE_LIMITS", '{"search_locations": {"rate": 2}}')
+    limits = utils_ratelimit.load_limits()
+    assert limits["search_locations"].rate == 2
+    assert limits["search_locations"].burst == utils_ratelimit.DEFAULT_LIMITS["search_locations"].burst
+
+
+def test_warns_once_for_private_peer_with_forwarded_for(monkeypatch, caplog):
+    monkeypatch.setattr(utils_ratelimit, "_warned_untrusted_proxy", False)
+    headers = {"x-forwarded-for": "1.2.3.4"}
+    with caplog.at_level("WARNING", logger="utils_ratelimit"):
+        client_ip(headers, Peer(), trust_proxy=False)
+        client_ip(headers, Peer(), trust_proxy=False)
+    assert len([r for r in caplog.records if "TRUST_PROXY_HEADERS" in r.getMessage()]) == 1
+
+
+def test_no_warning_without_forwarded_for(monkeypatch, caplog):
+    monkeypatch.setattr(utils_ratelimit, "_warned_untrusted_proxy", False)
+    with caplog.at_level("WARNING", logger="utils_ratelimit"):
+        client_ip({}, Peer(), trust_proxy=False)
+    assert not caplog.records